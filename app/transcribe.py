@@ -1,157 +1,373 @@
 #!/usr/bin/env python3
-"""Download audio from a YouTube URL and transcribe it using OpenAI Whisper."""
+"""Download audio from a YouTube URL and transcribe it using faster-whisper."""
 
 import argparse
+import itertools
+import json
 import os
-import subprocess
+import re
 import sys
-import warnings
+import threading
 import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterable, Iterator, TextIO
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Suppress FP16 warning on CPU
-warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
+try:
+    import ctranslate2
+    import numpy as np
+    from faster_whisper import BatchedInferencePipeline, WhisperModel, download_model, format_timestamp
+except ImportError:
+    print("Error: faster-whisper not installed", file=sys.stderr)
+    sys.exit(1)
 
 try:
-    import whisper
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadError, YoutubeDLError
 except ImportError:
-    print("Error: openai-whisper not installed", file=sys.stderr)
+    print("Error: yt-dlp not installed", file=sys.stderr)
     sys.exit(1)
 
 # Supported video and audio file extensions
-SUPPORTED_EXTENSIONS = {'.mp4', '.mkv', '.webm', '.avi', '.mp3', '.m4a', '.wav', '.flac', '.ogg'}
+SUPPORTED_EXTENSIONS = frozenset({'.mp4', '.mkv', '.webm', '.avi', '.mp3', '.m4a', '.wav', '.flac', '.ogg'})
+
+# http(s) URL whose host is youtube.com, youtu.be or one of their subdomains,
+# optionally with an explicit port
+_YOUTUBE_URL_RE = re.compile(r'^https?://(?:[^/]*\.)?(?:youtube\.com|youtu\.be)(?::\d+)?/', re.IGNORECASE)
+
+# Characters removed from titles by sanitize_filename
+_FILENAME_STRIP = str.maketrans('', '', r'<>:"/\|?*')
 
 # Valid Whisper model names
 VALID_MODELS = {'tiny', 'base', 'small', 'medium', 'large', 'large-v2', 'large-v3'}
 
-# Chunking defaults (in seconds)
+# yt-dlp options (best audio, converted to mp3)
+_YDL_OPTS = {
+    "format": "bestaudio/best",
+    "postprocessors": [{
+        "key": "FFmpegExtractAudio",
+        "preferredcodec": "mp3",
+        "preferredquality": "0",
+    }],
+    "noplaylist": True,
+    "quiet": True,
+}
+
+# Whisper models take 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Audio is decoded and transcribed in chunks of this many seconds to bound memory
 DEFAULT_CHUNK_DURATION = 3600   # 60 minutes
-DEFAULT_CHUNK_THRESHOLD = 7200  # 120 minutes
+
+# Number of 30-second windows decoded together by the batched pipeline
+DEFAULT_BATCH_SIZE = 8
+
+# Downloads run in background threads while the model transcribes in the main thread
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+
+# Decoding presets selectable with --accuracy; "fast" is greedy decoding
+DECODE_PRESETS = {
+    "fast": {"beam_size": 1, "best_of": 1, "temperature": 0.0},
+    "default": {"beam_size": 5},
+    "accurate": {"beam_size": 10, "patience": 2.0},
+}
+
+_print_lock = threading.Lock()
+
+# Per-thread log buffers, see run_logged()
+_log_local = threading.local()
+
+# URL -> title cache kept in the output directory (JSON lines, append-only)
+TITLE_CACHE_FILE = ".title_cache.jsonl"
+_title_cache_lock = threading.Lock()
+
+# Per-thread YoutubeDL instances, see get_youtube_dl()
+_ydl_local = threading.local()
+
+# Per-title [lock, users] pairs, see title_lock()
+_title_locks: dict[str, list] = {}
+_title_locks_guard = threading.Lock()
+
+
+class LogBuffer:
+    """log() lines of one download, held until the main loop reaches its item."""
+
+    def __init__(self):
+        self.lines = []
+        # Set once the main loop waits on the item; later lines print directly
+        self.live = False
+
+
+def log(*args, **kwargs) -> None:
+    """print() under a lock so lines from download workers and the main thread don't interleave.
+
+    Inside run_logged() the line is collected instead, until its buffer goes live.
+    """
+    buffer = getattr(_log_local, "buffer", None)
+    with _print_lock:
+        if buffer is not None and not buffer.live:
+            buffer.lines.append((args, kwargs))
+            return
+        print(*args, **kwargs)
+
+
+def run_logged(buffer: LogBuffer, func, *args):
+    """Call func(*args) with this thread's log() output collected into buffer.
+
+    Download workers run through this so each item's output is printed under
+    that item rather than mixed into the output of the item in progress.
+    """
+    _log_local.buffer = buffer
+    try:
+        return func(*args)
+    finally:
+        _log_local.buffer = None
+
+
+class YtDlpLogger:
+    """Route yt-dlp messages through log() so they land in the item's output."""
+
+    def debug(self, msg: str) -> None:
+        # Screen output; suppressed as with quiet=True
+        pass
+
+    def warning(self, msg: str) -> None:
+        log(f"  WARNING: {msg}", file=sys.stderr)
+
+    def error(self, msg: str) -> None:
+        log(f"  {msg}", file=sys.stderr)
 
 
 def sanitize_filename(name: str, max_length: int = 200) -> str:
     """Sanitize filename to prevent path traversal and filesystem issues."""
-    # Remove/replace invalid characters
-    for ch in r'<>:"/\|?*':
-        name = name.replace(ch, "")
-    # Remove path separators to prevent path traversal
-    name = name.replace('/', '').replace('\\', '')
-    # Remove leading/trailing dots and spaces
-    name = name.strip('. ')
+    # Remove invalid characters and path separators (prevents path traversal)
+    # in a single pass, then leading/trailing dots and spaces
+    name = name.translate(_FILENAME_STRIP).strip('. ')
     # Limit filename length
     if len(name) > max_length:
         name = name[:max_length]
     return name or "transcript"
 
 
-def get_video_title(url: str) -> str:
-    """Get the video title from YouTube for use in output filenames."""
-    cmd = ["yt-dlp", "--print", "title", "--no-playlist", url]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode == 0 and result.stdout.strip():
-        title = result.stdout.strip()
-        return sanitize_filename(title)
-    return "transcript"
+def split_filename(filepath: str) -> tuple[str, str]:
+    """Split a local file path into (name without extension, lowercase extension)."""
+    name, ext = os.path.splitext(os.path.basename(filepath))
+    return name, ext.lower()
 
 
 def get_title_from_filename(filepath: str) -> str:
     """Extract clean title from local file path."""
-    basename = os.path.basename(filepath)
-    title = os.path.splitext(basename)[0]
-    return sanitize_filename(title)
+    return sanitize_filename(split_filename(filepath)[0])
 
 
 def is_video_file(filepath: str) -> bool:
     """Check if file is a supported video/audio file."""
-    ext = os.path.splitext(filepath)[1].lower()
-    return ext in SUPPORTED_EXTENSIONS
+    return split_filename(filepath)[1] in SUPPORTED_EXTENSIONS
 
 
 def is_youtube_url(url: str) -> bool:
     """Check if string is a valid YouTube URL."""
-    return url.startswith(('http://', 'https://')) and \
-           ('youtube.com' in url or 'youtu.be' in url)
+    return _YOUTUBE_URL_RE.match(url) is not None
 
 
-def download_audio(url: str, output_dir: str, title: str) -> str:
-    """Download audio from a YouTube URL using yt-dlp.
+def output_exists(output_dir: str, name: str, existing_files: set[str] | None = None) -> bool:
+    """Check whether a file exists in the output directory.
 
-    Skips download if the audio file already exists.
+    Uses the pre-listed existing_files set when given instead of a stat call.
     """
-    audio_path = os.path.join(output_dir, f"{title}.mp3")
+    if existing_files is None:
+        return os.path.exists(os.path.join(output_dir, name))
+    return name in existing_files
 
-    if os.path.exists(audio_path):
-        print(f"  Audio already exists, skipping download.")
-        return audio_path
 
-    output_template = os.path.join(output_dir, f"{title}.%(ext)s")
-    cmd = [
-        "yt-dlp",
-        "--extract-audio",
-        "--audio-format", "mp3",
-        "--audio-quality", "0",
-        "-o", output_template,
-        "--no-playlist",
-        url,
-    ]
-    print(f"  Downloading audio...", flush=True)
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        print("  yt-dlp failed. See error above.", file=sys.stderr)
-        return ""
-
-    if not os.path.exists(audio_path):
-        print(f"  Expected file not found: {audio_path}", file=sys.stderr)
-        return ""
-
-    print(f"  Audio downloaded.")
-    return audio_path
-
-
-def get_audio_duration(audio_path: str) -> float:
-    """Return audio duration in seconds using ffprobe. Returns 0 on failure."""
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        audio_path,
-    ]
+def load_title_cache(output_dir: str) -> dict[str, str]:
+    """Load the URL -> title cache written by earlier runs into the output directory."""
+    title_cache = {}
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return float(result.stdout.strip())
-    except (ValueError, Exception):
-        return 0.0
-
-
-def split_audio(audio_path: str, chunk_duration: int, tmp_dir: str) -> list[str]:
-    """Split audio into chunks of chunk_duration seconds using ffmpeg.
+        with open(os.path.join(output_dir, TITLE_CACHE_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    title_cache[entry["url"]] = entry["title"]
+                except (ValueError, KeyError, TypeError):
+                    # Skip a line torn by an interrupted write
+                    continue
+    except FileNotFoundError:
+        pass
+    return title_cache
+
+
+def remember_title(output_dir: str, title_cache: dict[str, str], url: str, title: str) -> None:
+    """Record a URL's title in memory and append it to the on-disk cache."""
+    with _title_cache_lock:
+        title_cache[url] = title
+        with open(os.path.join(output_dir, TITLE_CACHE_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"url": url, "title": title}, ensure_ascii=False) + "\n")
+
+
+def get_youtube_dl(output_dir: str) -> YoutubeDL:
+    """Return this thread's YoutubeDL instance, creating it on first use.
+
+    The instance is reused for every URL so extractor state, cookies and the
+    player cache carry over. YoutubeDL is not thread-safe, so each download
+    worker keeps its own.
+
+    A worker whose output is not buffered (see run_logged) prints yt-dlp's
+    progress bar and messages directly; a buffered one routes messages into
+    its buffer and hides the progress bar.
+    """
+    buffered = getattr(_log_local, "buffer", None) is not None
+    ydl = getattr(_ydl_local, "ydl", None)
+    if ydl is None or _ydl_local.key != (output_dir, buffered):
+        # The title is only known per video, so download under the video id
+        # and rename afterwards. '%' is escaped so the directory is not read
+        # as a template field.
+        output_template = os.path.join(output_dir.replace("%", "%%"), ".download_%(id)s.%(ext)s")
+        opts = {**_YDL_OPTS, "outtmpl": output_template}
+        if buffered:
+            opts.update(logger=YtDlpLogger(), noprogress=True)
+        ydl = YoutubeDL(opts)
+        _ydl_local.ydl = ydl
+        _ydl_local.key = (output_dir, buffered)
+    return ydl
+
+
+@contextmanager
+def title_lock(title: str) -> Iterator[None]:
+    """Hold the lock for downloading to <title>.mp3.
+
+    Different URLs can resolve to the same title (or the same video), and
+    would otherwise write and rename the same files concurrently. A lock only
+    exists while some worker holds or waits for it.
+    """
+    with _title_locks_guard:
+        entry = _title_locks.setdefault(title, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _title_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _title_locks[title]
+
+
+def download_audio(url: str, output_dir: str, existing_files: set[str] | None = None, title_cache: dict[str, str] | None = None) -> tuple[str, str] | None:
+    """Download audio from a YouTube URL using the yt-dlp library.
+
+    Metadata is extracted once and reused for the download.
+    Skips download if the audio file already exists; with a cached title
+    this needs no network request at all.
+    Returns (title, audio_path), or None on failure.
+    """
+    title = title_cache.get(url) if title_cache is not None else None
+    if title is not None and output_exists(output_dir, f"{title}.mp3", existing_files):
+        log(f"  Title: {title}")
+        log(f"  Audio already exists, skipping download.")
+        return title, os.path.join(output_dir, f"{title}.mp3")
 
-    Returns sorted list of chunk file paths.
+    ydl = get_youtube_dl(output_dir)
+    try:
+        info = ydl.extract_info(url, download=False)
+        title = sanitize_filename(info.get("title") or "")
+        log(f"  Title: {title}")
+        if title_cache is not None and title_cache.get(url) != title:
+            remember_title(output_dir, title_cache, url, title)
+
+        audio_path = os.path.join(output_dir, f"{title}.mp3")
+        with title_lock(title):
+            if output_exists(output_dir, f"{title}.mp3", existing_files):
+                log(f"  Audio already exists, skipping download.")
+                return title, audio_path
+
+            log(f"  Downloading audio...", flush=True)
+            info = ydl.process_ie_result(info, download=True)
+
+            downloads = info.get("requested_downloads") or [{}]
+            downloaded_path = downloads[0].get("filepath", "")
+            if not os.path.exists(downloaded_path):
+                log(f"  Expected file not found: {downloaded_path}", file=sys.stderr)
+                return None
+            os.replace(downloaded_path, audio_path)
+            if existing_files is not None:
+                existing_files.add(f"{title}.mp3")
+    except DownloadError:
+        log("  yt-dlp failed. See error above.", file=sys.stderr)
+        return None
+    except (YoutubeDLError, OSError) as e:
+        # Raised without being reported by yt-dlp first (e.g. from
+        # process_ie_result, or file errors while renaming)
+        log(f"  yt-dlp failed: {e}", file=sys.stderr)
+        return None
+
+    log(f"  Audio downloaded.")
+    return title, audio_path
+
+
+def stream_audio(audio_path: str, chunk_duration: int) -> Iterator[np.ndarray]:
+    """Decode an audio/video file with one long-lived ffmpeg process.
+
+    Yields consecutive chunks of chunk_duration seconds as 16 kHz mono
+    float32 arrays, so memory stays bounded regardless of file length and
+    nothing is written to disk.
     """
-    os.makedirs(tmp_dir, exist_ok=True)
-    output_pattern = os.path.join(tmp_dir, "chunk_%03d.mp3")
     cmd = [
-        "ffmpeg", "-y", "-i", audio_path,
-        "-f", "segment",
-        "-segment_time", str(chunk_duration),
-        "-c", "copy",
-        output_pattern,
+        "ffmpeg", "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", audio_path,
+        # Audio only: never decode video/subtitle/data streams of local video files
+        "-vn", "-sn", "-dn",
+        "-f", "s16le",
+        "-ac", "1",
+        "-ar", str(SAMPLE_RATE),
+        "-",
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"  Error splitting audio: {result.stderr}", file=sys.stderr)
-        return []
-    chunks = sorted(
-        str(p) for p in Path(tmp_dir).glob("chunk_*.mp3")
-    )
-    return chunks
+    chunk_bytes = chunk_duration * SAMPLE_RATE * 2  # s16le = 2 bytes per sample
+    # ffmpeg errors go straight to the terminal; stdout carries raw PCM
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=1 << 20) as proc:
+        while True:
+            # Grown as PCM arrives rather than preallocated, so a short clip
+            # never pays for a full chunk_duration buffer
+            pcm = bytearray()
+            while len(pcm) < chunk_bytes:
+                data = proc.stdout.read1(min(chunk_bytes - len(pcm), 1 << 20))
+                if not data:
+                    break
+                pcm += data
+            if not pcm:
+                break
+            audio = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2).astype(np.float32)
+            del pcm
+            audio /= 32768.0
+            yield audio
+    if proc.returncode != 0:
+        raise RuntimeError("ffmpeg failed to decode audio. See error above.")
+
+
+def transcribe_segments(audio_path: str, model, options: dict, chunk_duration: int, out: TextIO) -> None:
+    """Transcribe an audio file chunk by chunk, printing segments as they are decoded.
+
+    Segment text is written to out as it arrives instead of being collected.
+    """
+    offset = 0.0
+    for audio in stream_audio(audio_path, chunk_duration):
+        segments, _ = model.transcribe(audio, **options)
+        for segment in segments:
+            log(f"[{format_timestamp(offset + segment.start)} --> {format_timestamp(offset + segment.end)}]{segment.text}", flush=True)
+            out.write(segment.text)
+        offset += len(audio) / SAMPLE_RATE
 
 
-def transcribe_audio(audio_path: str, model, language: str | None, output_dir: str, title: str, chunk_duration: int = DEFAULT_CHUNK_DURATION, chunk_threshold: int = DEFAULT_CHUNK_THRESHOLD) -> bool:
+def transcribe_audio(audio_path: str, model, options: dict, output_dir: str, title: str, chunk_duration: int = DEFAULT_CHUNK_DURATION, existing_files: set[str] | None = None) -> bool:
     """Transcribe audio file using Whisper and save the result.
 
     Skips transcription if output file already exists.
@@ -159,132 +375,221 @@ def transcribe_audio(audio_path: str, model, language: str | None, output_dir: s
     """
     txt_path = os.path.join(output_dir, f"{title}.txt")
 
-    if os.path.exists(txt_path):
-        print(f"  Transcript already exists, skipping.")
+    if output_exists(output_dir, f"{title}.txt", existing_files):
+        log(f"  Transcript already exists, skipping.")
         return True
 
-    # Validate audio file exists
-    if not os.path.exists(audio_path):
-        print(f"  Error: Audio file not found: {audio_path}", file=sys.stderr)
-        return False
-
-    options = {
-        "verbose": True,
-    }
-    if language:
-        options["language"] = language
-
     try:
-        print(f"  Transcribing...", flush=True)
-        duration = get_audio_duration(audio_path)
-
-        if duration > chunk_threshold:
-            # --- Chunked transcription ---
-            minutes = int(duration // 60)
-            print(f"  Audio duration: {minutes} min — splitting into {chunk_duration // 60}-minute chunks...", flush=True)
-            tmp_dir = os.path.join(output_dir, f".chunks_{title}")
-            chunks = split_audio(audio_path, chunk_duration, tmp_dir)
-            if not chunks:
-                print(f"  Error: Failed to split audio.", file=sys.stderr)
-                return False
-
-            print(f"  Total chunks: {len(chunks)}", flush=True)
-            texts = []
-            try:
-                for i, chunk_path in enumerate(chunks, start=1):
-                    print(f"  Chunk {i}/{len(chunks)}: {os.path.basename(chunk_path)}", flush=True)
-                    result = model.transcribe(chunk_path, **options)
-                    texts.append(result["text"].strip())
-            finally:
-                # Always clean up temp chunks
-                shutil.rmtree(tmp_dir, ignore_errors=True)
-
-            full_text = " ".join(texts)
-        else:
-            # --- Normal transcription ---
-            result = model.transcribe(audio_path, **options)
-            full_text = result["text"]
-
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(full_text)
-        print(f"  Saved: {txt_path}")
+        log(f"  Transcribing...", flush=True)
+        # Write to a temporary file so an interrupted run never leaves a
+        # partial transcript that the next run would skip
+        part_path = f"{txt_path}.part"
+        try:
+            with open(part_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+                transcribe_segments(audio_path, model, options, chunk_duration, f)
+            os.replace(part_path, txt_path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        if existing_files is not None:
+            existing_files.add(f"{title}.txt")
+        log(f"  Saved: {txt_path}")
         return True
     except Exception as e:
-        print(f"  Error during transcription: {e}", file=sys.stderr)
+        log(f"  Error during transcription: {e}", file=sys.stderr)
         return False
 
 
-def cleanup_video_files(output_dir: str, title: str) -> None:
-    """Delete any video files matching the title (keeping only audio)."""
-    video_extensions = {'.mp4', '.mkv', '.webm', '.avi', '.mov', '.flv', '.wmv', '.m4v'}
-    for ext in video_extensions:
-        video_path = os.path.join(output_dir, f"{title}{ext}")
-        if os.path.exists(video_path):
-            try:
-                os.remove(video_path)
-                print(f"  Deleted video file: {video_path}")
-            except OSError as e:
-                print(f"  Warning: Could not delete {video_path}: {e}", file=sys.stderr)
-
+def download_video(url: str, output_dir: str, enable_download: bool = True, enable_transcription: bool = True, existing_files: set[str] | None = None, title_cache: dict[str, str] | None = None) -> tuple[str, str] | None:
+    """Download stage for a single video: resolve its title and fetch the audio.
 
-def process_video(url: str, model, language: str | None, output_dir: str, enable_download: bool = True, enable_transcription: bool = True, chunk_duration: int = DEFAULT_CHUNK_DURATION, chunk_threshold: int = DEFAULT_CHUNK_THRESHOLD) -> bool:
-    """Process a single video: download audio and transcribe.
-    
-    Returns True if successful, False otherwise.
+    Runs in a worker thread so downloads overlap transcription of earlier items.
+    Returns (title, audio_path), or None if nothing was downloaded.
     """
     if not is_youtube_url(url):
-        print(f"  Error: Invalid YouTube URL: {url}", file=sys.stderr)
-        return False
-    
-    title = get_video_title(url)
-    print(f"\n[{title}]")
-    print(f"  URL: {url}")
+        log(f"  Error: Invalid YouTube URL: {url}", file=sys.stderr)
+        return None
+
+    log(f"\n[{url}]")
 
     # Check if download is enabled
     if not enable_download:
-        print(f"  Download disabled (ENABLE_DOWNLOAD=false), skipping.")
-        return False
+        log(f"  Download disabled (ENABLE_DOWNLOAD=false), skipping.")
+        return None
+
+    # A transcript from an earlier run leaves nothing to fetch for this URL
+    title = title_cache.get(url) if title_cache is not None else None
+    if enable_transcription and title is not None and output_exists(output_dir, f"{title}.txt", existing_files):
+        log(f"  Title: {title}")
+        return title, os.path.join(output_dir, f"{title}.mp3")
+
+    downloaded = download_audio(url, output_dir, existing_files, title_cache)
+    if downloaded is None:
+        log(f"  Skipping transcription due to download error.")
+        return None
+    # yt-dlp deletes the downloaded source after extracting the mp3; partial
+    # .download_<id> files from a failed run are kept so the next run resumes them
+    return downloaded
 
-    audio_path = download_audio(url, output_dir, title)
-    if not audio_path:
-        print(f"  Skipping transcription due to download error.")
-        return False
 
-    # Delete any video files after audio extraction
-    cleanup_video_files(output_dir, title)
+def process_video(downloaded: tuple[str, str] | None, model, options: dict, output_dir: str, enable_transcription: bool = True, chunk_duration: int = DEFAULT_CHUNK_DURATION, existing_files: set[str] | None = None) -> bool:
+    """Transcription stage for a single video downloaded by download_video.
+
+    Returns True if successful, False otherwise.
+    """
+    if downloaded is None:
+        return False
+    title, audio_path = downloaded
 
     # Check if transcription is enabled
     if not enable_transcription:
-        print(f"  Transcription disabled (ENABLE_TRANSCRIPTION=false), skipping.")
+        log(f"  Transcription disabled (ENABLE_TRANSCRIPTION=false), skipping.")
         return True
 
-    return transcribe_audio(audio_path, model, language, output_dir, title, chunk_duration, chunk_threshold)
+    return transcribe_audio(audio_path, model, options, output_dir, title, chunk_duration, existing_files)
 
 
-def process_local_file(filepath: str, model, language: str | None, output_dir: str, enable_transcription: bool = True, chunk_duration: int = DEFAULT_CHUNK_DURATION, chunk_threshold: int = DEFAULT_CHUNK_THRESHOLD) -> bool:
+def process_local_file(filepath: str, model, options: dict, output_dir: str, enable_transcription: bool = True, chunk_duration: int = DEFAULT_CHUNK_DURATION, existing_files: set[str] | None = None) -> bool:
     """Process a local video/audio file: transcribe directly without downloading.
-    
+
+    filepath must already be resolved by resolve_local_file.
     Returns True if successful, False otherwise.
     """
-    if not os.path.exists(filepath):
-        print(f"  Error: File not found: {filepath}", file=sys.stderr)
-        return False
-
-    if not is_video_file(filepath):
-        print(f"  Error: Unsupported file type: {filepath}", file=sys.stderr)
-        print(f"  Supported extensions: {', '.join(sorted(SUPPORTED_EXTENSIONS))}", file=sys.stderr)
+    # One splitext serves both the type check and the title
+    name, ext = split_filename(filepath)
+    if ext not in SUPPORTED_EXTENSIONS:
+        log(f"  Error: Unsupported file type: {filepath}", file=sys.stderr)
+        log(f"  Supported extensions: {', '.join(sorted(SUPPORTED_EXTENSIONS))}", file=sys.stderr)
         return False
 
-    title = get_title_from_filename(filepath)
-    print(f"\n[{title}]")
-    print(f"  Local file: {filepath}")
+    title = sanitize_filename(name)
+    log(f"\n[{title}]")
+    log(f"  Local file: {filepath}")
 
     # Check if transcription is enabled
     if not enable_transcription:
-        print(f"  Transcription disabled (ENABLE_TRANSCRIPTION=false), skipping.")
+        log(f"  Transcription disabled (ENABLE_TRANSCRIPTION=false), skipping.")
         return False
 
-    return transcribe_audio(filepath, model, language, output_dir, title, chunk_duration, chunk_threshold)
+    return transcribe_audio(filepath, model, options, output_dir, title, chunk_duration, existing_files)
+
+
+def resolve_local_file(item: str, output_dir: str) -> str | None:
+    """Resolve a local file item, checking as given and then relative to output_dir.
+
+    Returns the path, or None if neither exists.
+    """
+    # One stat per candidate location
+    for filepath in (item, os.path.join(output_dir, item)):
+        if os.path.isfile(filepath):
+            return filepath
+    return None
+
+
+def iter_items(list_path: str) -> Iterator[str]:
+    """Yield URLs/files from a list file (one per line), skipping blanks and # comments.
+
+    Lines are read lazily so large batch files are never held in memory.
+    """
+    with open(list_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def queue_downloads(executor: ThreadPoolExecutor, items: Iterable[str], lookahead: int, output_dir: str, enable_download: bool = True, enable_transcription: bool = True, existing_files: set[str] | None = None, title_cache: dict[str, str] | None = None, buffer_output: bool = True) -> Iterator[tuple[str, Future | None, LogBuffer]]:
+    """Submit download_video for URL items and yield (item, future, log buffer) in input order.
+
+    At most lookahead downloads are queued ahead of the item being yielded,
+    so items are consumed lazily. Local files are yielded with no future.
+    A URL repeated within the queued window shares the future of its first
+    occurrence instead of downloading the same video twice at once; later
+    repeats are skipped by download_video. With buffer_output, each
+    download's output is held in its log buffer, see finish_download();
+    otherwise workers print directly.
+    """
+    pending = deque()
+    # URL -> future for downloads in the pending window only
+    queued: dict[str, Future] = {}
+    for item in items:
+        download = None
+        download_log = LogBuffer()
+        if item.startswith(("http://", "https://")):
+            download = queued.get(item)
+            if download is None:
+                args = (item, output_dir, enable_download, enable_transcription, existing_files, title_cache)
+                if buffer_output:
+                    download = executor.submit(run_logged, download_log, download_video, *args)
+                else:
+                    download = executor.submit(download_video, *args)
+                queued[item] = download
+        pending.append((item, download, download_log))
+        if len(pending) > lookahead:
+            # The caller waits on this download before resuming the
+            # generator, so a later repeat can no longer overlap it
+            next_item = pending.popleft()
+            queued.pop(next_item[0], None)
+            yield next_item
+    while pending:
+        yield pending.popleft()
+
+
+def finish_download(download: Future, download_log: LogBuffer) -> tuple[str, str] | None:
+    """Wait for a queued download, printing its output so far and then live.
+
+    A worker exception fails this item only, not the batch.
+    """
+    with _print_lock:
+        for args, kwargs in download_log.lines:
+            print(*args, **kwargs)
+        download_log.lines.clear()
+        download_log.live = True
+    error = None
+    try:
+        downloaded = download.result()
+    except Exception as e:
+        downloaded, error = None, e
+    if error is not None:
+        log(f"  Error: Download failed: {error}", file=sys.stderr)
+    return downloaded
+
+
+def remove_cached_model(model_name: str, cache_dir: str) -> None:
+    """Delete a cached model from the Hugging Face cache so it is downloaded again."""
+    try:
+        snapshot_path = download_model(model_name, local_files_only=True, cache_dir=cache_dir)
+    except Exception:
+        return
+    # Snapshots live in <cache>/models--<org>--<name>/snapshots/<revision>
+    repo_dir = Path(snapshot_path).parents[1]
+    log(f"Force downloading model (removing cached: {repo_dir})", flush=True)
+    shutil.rmtree(repo_dir, ignore_errors=True)
+
+
+def load_model(model_name: str, cache_dir: str, language: str | None, force_download: bool = False, cpu_threads: int = 0) -> BatchedInferencePipeline:
+    """Load a faster-whisper model, warm it up and wrap it in a batched pipeline.
+
+    Raises on failure.
+    """
+    # Force re-download model if requested
+    if force_download:
+        remove_cached_model(model_name, cache_dir)
+
+    # int8 weights everywhere; activations in float16 on GPU
+    device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    log(f"Loading Whisper model: {model_name} ({device}, {compute_type})", flush=True)
+    # cpu_threads=0 lets CTranslate2 pick (OMP_NUM_THREADS or 4)
+    whisper_model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads, download_root=cache_dir)
+
+    # Warm up on one second of silence so one-time backend initialization
+    # happens here rather than inside the first item
+    segments, _ = whisper_model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language=language or None, beam_size=1)
+    list(segments)
+
+    # Batch 30-second windows through the encoder/decoder instead of one at a time
+    return BatchedInferencePipeline(model=whisper_model)
 
 
 def str_to_bool(value: str) -> bool:
@@ -315,6 +620,18 @@ def main():
         default=None,
         help="Model cache directory. Default: <output>/model-cache",
     )
+    parser.add_argument(
+        "-d", "--download-concurrency",
+        type=int,
+        default=int(os.environ.get("DOWNLOAD_CONCURRENCY", str(DEFAULT_DOWNLOAD_CONCURRENCY))),
+        help=f"Number of parallel YouTube downloads. Default: {DEFAULT_DOWNLOAD_CONCURRENCY}",
+    )
+    parser.add_argument(
+        "-a", "--accuracy",
+        choices=sorted(DECODE_PRESETS),
+        default=os.environ.get("WHISPER_ACCURACY", "default"),
+        help="Decoding preset: fast (greedy), default (beam search) or accurate (wider beam). Default: default",
+    )
     args = parser.parse_args()
 
     # Show help if no input provided
@@ -328,6 +645,14 @@ def main():
     except OSError as e:
         print(f"Error: Failed to create output directory '{args.output}': {e}", file=sys.stderr)
         sys.exit(1)
+
+    # List the output directory once; skip checks for existing audio and
+    # transcripts become set lookups instead of a stat call per file
+    with os.scandir(args.output) as entries:
+        existing_files = {entry.name for entry in entries}
+
+    # Titles of URLs seen in earlier runs, so finished items need no yt-dlp lookup
+    title_cache = load_title_cache(args.output)
     
     # Set cache directory with priority: argument > default (output/model-cache)
     if args.cache is not None:
@@ -347,7 +672,8 @@ def main():
     enable_transcription = str_to_bool(os.environ.get("ENABLE_TRANSCRIPTION", "false"))
     force_download_model = str_to_bool(os.environ.get("FORCE_DOWNLOAD_MODEL", "false"))
     chunk_duration = int(os.environ.get("CHUNK_DURATION", str(DEFAULT_CHUNK_DURATION)))
-    chunk_threshold = int(os.environ.get("CHUNK_THRESHOLD", str(DEFAULT_CHUNK_THRESHOLD)))
+    batch_size = int(os.environ.get("BATCH_SIZE", str(DEFAULT_BATCH_SIZE)))
+    cpu_threads = int(os.environ.get("WHISPER_CPU_THREADS", "0"))
 
     # Print all configuration
     print("=== Configuration ===", flush=True)
@@ -355,11 +681,14 @@ def main():
     print(f"  Language: {args.language}", flush=True)
     print(f"  Output directory: {args.output}", flush=True)
     print(f"  Cache directory: {model_cache_dir}", flush=True)
+    print(f"  Download concurrency: {args.download_concurrency}", flush=True)
+    print(f"  Accuracy: {args.accuracy}", flush=True)
     print(f"  ENABLE_DOWNLOAD: {enable_download}", flush=True)
     print(f"  ENABLE_TRANSCRIPTION: {enable_transcription}", flush=True)
     print(f"  FORCE_DOWNLOAD_MODEL: {force_download_model}", flush=True)
     print(f"  CHUNK_DURATION: {chunk_duration // 60} min", flush=True)
-    print(f"  CHUNK_THRESHOLD: {chunk_threshold // 60} min", flush=True)
+    print(f"  BATCH_SIZE: {batch_size}", flush=True)
+    print(f"  WHISPER_CPU_THREADS: {cpu_threads or 'auto'}", flush=True)
     print("=" * 22, flush=True)
     
     if not enable_download and not enable_transcription:
@@ -371,7 +700,27 @@ def main():
         print(f"Valid models: {', '.join(sorted(VALID_MODELS))}", file=sys.stderr)
         sys.exit(1)
 
+    if args.download_concurrency < 1:
+        print(f"Error: Download concurrency must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if chunk_duration < 1:
+        print(f"Error: CHUNK_DURATION must be at least 1 second", file=sys.stderr)
+        sys.exit(1)
+
+    # Validate decoding preset (WHISPER_ACCURACY bypasses argparse choices)
+    if args.accuracy not in DECODE_PRESETS:
+        print(f"Error: Invalid accuracy '{args.accuracy}'", file=sys.stderr)
+        print(f"Valid values: {', '.join(sorted(DECODE_PRESETS))}", file=sys.stderr)
+        sys.exit(1)
+
+    # Decoding options are the same for every item, so build them once
+    decode_options = {**DECODE_PRESETS[args.accuracy], "batch_size": batch_size}
+    if args.language:
+        decode_options["language"] = args.language
+
     # Collect items to process (URLs or local files)
+    list_path = None
     items = []
 
     # Check if input is a file in output directory
@@ -381,16 +730,7 @@ def main():
         # Input is a direct file path
         if args.input.endswith('.txt'):
             # Text file containing list of URLs or files
-            try:
-                with open(args.input, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            items.append(line)
-            except UnicodeDecodeError:
-                print(f"Error: File {args.input} is not UTF-8 encoded", file=sys.stderr)
-                sys.exit(1)
-            print(f"Found {len(items)} item(s) in {args.input}")
+            list_path = args.input
         else:
             # Single local video/audio file
             items.append(args.input)
@@ -398,16 +738,7 @@ def main():
         # File exists in output directory
         if input_path.endswith('.txt'):
             # Text file containing list of URLs or files
-            try:
-                with open(input_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            items.append(line)
-            except UnicodeDecodeError:
-                print(f"Error: File {args.input} is not UTF-8 encoded", file=sys.stderr)
-                sys.exit(1)
-            print(f"Found {len(items)} item(s) in {args.input}")
+            list_path = input_path
         else:
             # Single local video/audio file
             items.append(input_path)
@@ -417,73 +748,88 @@ def main():
     else:
         print(f"Error: Input is not a valid URL or file: {args.input}", file=sys.stderr)
         sys.exit(1)
-    
-    # Validate batch is not empty
-    if not items:
-        print(f"Error: No valid items found in {args.input}", file=sys.stderr)
-        sys.exit(1)
 
-    # Load Whisper model only if transcription is enabled
-    model = None
-    if enable_transcription:
-        cache_dir = Path(model_cache_dir)
-        
-        # Set environment variable for torch to use our cache directory
-        os.environ["TORCH_HOME"] = model_cache_dir
-        
-        # Force re-download model if requested
-        if force_download_model:
-            model_file = cache_dir / f"{args.model}.pt"
-            if model_file.exists():
-                print(f"Force downloading model (removing cached: {model_file})", flush=True)
-                model_file.unlink()
+    if list_path is not None:
+        # Count entries up front (this also validates the encoding), then
+        # stream them during processing instead of holding the whole list
         try:
-            print(f"Loading Whisper model: {args.model}", flush=True)
-            model = whisper.load_model(args.model, download_root=model_cache_dir)
-        except Exception as e:
-            print(f"Error loading model: {e}", file=sys.stderr)
+            total = sum(1 for _ in iter_items(list_path))
+        except UnicodeDecodeError:
+            print(f"Error: File {args.input} is not UTF-8 encoded", file=sys.stderr)
             sys.exit(1)
+        print(f"Found {total} item(s) in {args.input}")
+        items = iter_items(list_path)
     else:
-        print(f"Skipping model loading (ENABLE_TRANSCRIPTION=false)")
+        total = len(items)
+    
+    # Validate batch is not empty
+    if not total:
+        print(f"Error: No valid items found in {args.input}", file=sys.stderr)
+        sys.exit(1)
 
     # Process each item
-    total = len(items)
     successes = 0
     errors = []
+    failed_items = set()
     
-    for idx, item in enumerate(items, start=1):
-        if total > 1:
-            item_display = os.path.basename(item) if not item.startswith("http") else item[:50]
-            print(f"\n[Processing {idx}/{total}] {item_display}")
-        
-        success = False
-        if item.startswith(("http://", "https://")):
-            # URL
-            success = process_video(item, model, args.language, args.output, enable_download, enable_transcription, chunk_duration, chunk_threshold)
+    with ThreadPoolExecutor(max_workers=args.download_concurrency) as executor:
+        # The model only runs in this thread, so upcoming audio is fetched
+        # while the current item is being transcribed. Taking the first item
+        # now starts the first downloads while the model is still loading.
+        # With at most one download running at a time its output, including
+        # yt-dlp's progress bar, is printed live instead of buffered
+        buffer_output = total > 1 and args.download_concurrency > 1
+        queued = queue_downloads(executor, items, args.download_concurrency, args.output, enable_download, enable_transcription, existing_files, title_cache, buffer_output)
+        first = next(queued)
+
+        # Load Whisper model only if transcription is enabled
+        model = None
+        if enable_transcription:
+            try:
+                model = load_model(args.model, model_cache_dir, args.language, force_download_model, cpu_threads)
+            except Exception as e:
+                log(f"Error loading model: {e}", file=sys.stderr)
+                executor.shutdown(wait=False, cancel_futures=True)
+                # Download threads are joined at interpreter exit even after
+                # shutdown(wait=False), so sys.exit() would wait for running
+                # downloads; exit immediately instead
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(1)
         else:
-            # Local file - check both absolute and relative to output dir
-            if os.path.isfile(item):
-                filepath = item
-            else:
-                filepath = os.path.join(args.output, item)
-            
-            if os.path.isfile(filepath):
-                success = process_local_file(filepath, model, args.language, args.output, enable_transcription, chunk_duration, chunk_threshold)
+            log(f"Skipping model loading (ENABLE_TRANSCRIPTION=false)")
+
+        for idx, (item, download, download_log) in enumerate(itertools.chain([first], queued), start=1):
+            if total > 1:
+                item_display = os.path.basename(item) if not item.startswith("http") else item[:50]
+                log(f"\n[Processing {idx}/{total}] {item_display}")
+
+            success = False
+            if item.startswith(("http://", "https://")):
+                # URL
+                success = process_video(finish_download(download, download_log), model, decode_options, args.output, enable_transcription, chunk_duration, existing_files)
             else:
-                print(f"  Error: File not found: {item}", file=sys.stderr)
-                errors.append((item, "File not found"))
-        
-        if success:
-            successes += 1
-        elif not any(err[0] == item for err in errors):
-            errors.append((item, "Processing failed"))
+                filepath = resolve_local_file(item, args.output)
+                if filepath is not None:
+                    success = process_local_file(filepath, model, decode_options, args.output, enable_transcription, chunk_duration, existing_files)
+                else:
+                    log(f"  Error: File not found: {item}", file=sys.stderr)
+                    if item not in failed_items:
+                        errors.append((item, "File not found"))
+                        failed_items.add(item)
+
+            if success:
+                successes += 1
+            elif item not in failed_items:
+                errors.append((item, "Processing failed"))
+                failed_items.add(item)
 
     # Summary
-    print(f"\nCompleted: {successes}/{total} successful")
+    log(f"\nCompleted: {successes}/{total} successful")
     if errors:
-        print(f"Failed: {len(errors)} items")
+        log(f"Failed: {len(errors)} items")
         for item, error in errors:
-            print(f"  - {os.path.basename(item) if not item.startswith('http') else item[:50]}: {error}")
+            log(f"  - {os.path.basename(item) if not item.startswith('http') else item[:50]}: {error}")
 
 
 if __name__ == "__main__":